@@ -0,0 +1,148 @@
+"""
+Generates one clear-sky weather year in every supported file format, loads
+each through ProsumerSim.load_weather and checks that looked-up irradiance
+lines up with Location.get_clearsky.
+
+    python check_weather.py
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from dashboard import ProsumerSim, TZ, LATITUDE, LONGITUDE, WEATHER_COLUMNS
+
+STD_TZ = 'Etc/GMT-2'  # Bucharest standard time, no DST
+
+# Lookup times: winter, summer (DST), leap day, after a leap day, year end
+CHECK_DAYS = ['2026-01-15', '2026-06-15', '2024-02-29', '2024-03-01', '2026-12-31']
+
+
+def clearsky_year(sim, year, tz=STD_TZ):
+    times = pd.date_range(f'{year}-01-01', f'{year + 1}-01-01', freq='h', tz=tz, inclusive='left')
+    weather = sim.location.get_clearsky(times)
+    weather['temp_air'] = 10.0
+    weather['wind_speed'] = 2.0
+    return weather[WEATHER_COLUMNS]
+
+
+def write_csv_standard_time(sim, folder):
+    path = os.path.join(folder, 'standard_time.csv')
+    df = clearsky_year(sim, 2019)
+    df.index = df.index.tz_localize(None)
+    df.to_csv(path)
+    return path
+
+
+def write_csv_wall_clock(sim, folder):
+    # Naive local time with DST: October hour repeats, March hour missing
+    path = os.path.join(folder, 'wall_clock.csv')
+    df = clearsky_year(sim, 2019)
+    df.index = df.index.tz_convert(TZ).tz_localize(None)
+    df.to_csv(path)
+    return path
+
+
+def write_csv_offsets(sim, folder):
+    path = os.path.join(folder, 'offsets.csv')
+    df = clearsky_year(sim, 2019)
+    df.index = pd.Index([t.isoformat() for t in df.index.tz_convert(TZ)])
+    df.to_csv(path)
+    return path
+
+
+def write_csv_month_first(sim, folder):
+    # Naive standard time written as mm-dd-YYYY HH:MM; the '-YYYY' is not an offset
+    path = os.path.join(folder, 'month_first.csv')
+    df = clearsky_year(sim, 2019)
+    df.index = df.index.tz_localize(None).strftime('%m-%d-%Y %H:%M')
+    df.to_csv(path)
+    return path
+
+
+def write_csv_gaps(sim, folder):
+    path = os.path.join(folder, 'gaps.csv')
+    df = clearsky_year(sim, 2019)
+    # Drop 5% of rows, but keep the checked days so interpolation doesn't blur them
+    keep = np.random.default_rng(0).random(len(df)) > 0.05
+    keep |= df.index.strftime('%m-%d').isin([d[5:] for d in CHECK_DAYS] + ['02-28'])
+    keep[0] = keep[-1] = True
+    df = df[keep]
+    df.index = df.index.tz_localize(None)
+    df.to_csv(path)
+    return path
+
+
+def write_npy(sim, folder, year, name):
+    path = os.path.join(folder, name)
+    df = clearsky_year(sim, year)
+    dtype = [('time', 'datetime64[s]')] + [(c, 'f8') for c in WEATHER_COLUMNS]
+    arr = np.zeros(len(df), dtype=dtype)
+    arr['time'] = df.index.tz_convert('UTC').tz_localize(None).to_numpy().astype('datetime64[s]')
+    for c in WEATHER_COLUMNS:
+        arr[c] = df[c].to_numpy()
+    np.save(path, arr)
+    return path
+
+
+def write_epw(sim, folder):
+    # TMY-style: odd months from 2001, even months from 2005
+    path = os.path.join(folder, 'tmy.epw')
+    lines = [f"LOCATION,Brasov,-,ROU,Synthetic,000000,{LATITUDE},{LONGITUDE},2.0,600"]
+    lines += ["DESIGN CONDITIONS,0", "TYPICAL/EXTREME PERIODS,0", "GROUND TEMPERATURES,0",
+              "HOLIDAYS/DAYLIGHT SAVINGS,No,0,0,0", "COMMENTS 1,synthetic", "COMMENTS 2,",
+              "DATA PERIODS,1,1,Data,Sunday, 1/ 1,12/31"]
+    for month in range(1, 13):
+        year = 2001 if month % 2 else 2005
+        start = pd.Timestamp(year=year, month=month, day=1, tz=STD_TZ)
+        times = pd.date_range(start, start + pd.offsets.MonthBegin(1), freq='h', inclusive='left')
+        cs = sim.location.get_clearsky(times)
+        for t, row in cs.iterrows():
+            fields = [0] * 35
+            fields[:5] = [t.year, t.month, t.day, t.hour + 1, 0]
+            fields[5] = '?'
+            fields[6] = 10.0
+            fields[13], fields[14], fields[15] = row['ghi'], row['dni'], row['dhi']
+            fields[21] = 2.0
+            lines.append(','.join(str(f) for f in fields))
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+def check(sim, name, path):
+    sim.load_weather(path)
+    times = pd.DatetimeIndex([])
+    for day in CHECK_DAYS:
+        times = times.append(pd.date_range(day, periods=24, freq='h', tz=TZ))
+    weather, measured = sim.get_weather(times)
+    expected = sim.location.get_clearsky(times)['ghi']
+    # Different years shift the sun slightly; an hour of misalignment is far larger
+    err = (weather['ghi'] - expected).abs().max()
+    ok = bool(measured.all()) and err < 25
+    print(f"{'PASS' if ok else 'FAIL'}  {name:<20} rows={sim.weather_len:<5} "
+          f"step={sim.weather_step:g}s max ghi error={err:.1f} W/m2")
+    return ok
+
+
+def main():
+    sim = ProsumerSim(weather_file=None)
+    with tempfile.TemporaryDirectory() as folder:
+        cases = [
+            ('csv standard time', write_csv_standard_time(sim, folder)),
+            ('csv wall clock', write_csv_wall_clock(sim, folder)),
+            ('csv utc offsets', write_csv_offsets(sim, folder)),
+            ('csv month-first', write_csv_month_first(sim, folder)),
+            ('csv with gaps', write_csv_gaps(sim, folder)),
+            ('npy', write_npy(sim, folder, 2019, 'year.npy')),
+            ('npy leap year', write_npy(sim, folder, 2020, 'leap.npy')),
+            ('epw tmy', write_epw(sim, folder)),
+        ]
+        results = [check(sim, name, path) for name, path in cases]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,7 @@ import random
 import time
 import sys
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 # Matplotlib
 import matplotlib.pyplot as plt
@@ -36,6 +36,11 @@ LATITUDE = 45.6427
 LONGITUDE = 25.5887
 TZ = 'Europe/Bucharest'
 
+# Optional local weather file (EPW, PVGIS/generic CSV or .npy structured array).
+# Leave as None to fall back to clear-sky irradiance with random cloud cover.
+WEATHER_FILE = None
+WEATHER_COLUMNS = ['ghi', 'dni', 'dhi', 'temp_air', 'wind_speed']
+
 
 # ==========================================
 #   BATTERY LOGIC
@@ -84,7 +89,7 @@ class BatterySystem:
 #   SIMULATION ENGINE
 # ==========================================
 class ProsumerSim:
-    def __init__(self):
+    def __init__(self, weather_file=WEATHER_FILE):
         sandia_modules = pvlib.pvsystem.retrieve_sam('SandiaMod')
         cec_inverters = pvlib.pvsystem.retrieve_sam('cecinverter')
         mod_name = next((c for c in sandia_modules.columns if 'Canadian_Solar' in c), sandia_modules.columns[0])
@@ -104,6 +109,187 @@ class ProsumerSim:
         self.battery = BatterySystem(capacity_kwh=10.0)
         self.cloud_cover = 1.0
 
+        # Weather file data, loaded once into plain arrays on a regular time grid
+        self.weather = None
+        self.weather_start = None
+        self.weather_step = None
+        self.weather_len = 0
+        self.weather_typical_year = False
+        self.weather_toy_start = None
+        # Site standard time (no DST): typical-year files are written in it and
+        # the time-of-year offset has to be in absolute time
+        self.weather_std_offset = pd.Timestamp('2001-01-15', tz=TZ).utcoffset()
+        if weather_file:
+            try:
+                self.load_weather(weather_file)
+            except Exception as e:
+                print(f"Weather File Error: {e} (falling back to clear-sky)")
+                self.weather = None
+
+    # =========================================
+    #  WEATHER FILE
+    # =========================================
+    @staticmethod
+    def read_weather_file(path):
+        if path.lower().endswith('.epw'):
+            return pvlib.iotools.read_epw(path)[0]
+
+        with open(path, 'r') as f:
+            first_line = f.readline()
+        if first_line.startswith('Latitude'):
+            # PVGIS TMY export
+            return pvlib.iotools.read_pvgis_tmy(path, pvgis_format='csv')[0]
+        return pd.read_csv(path, index_col=0)
+
+    def parse_weather_index(self, index):
+        if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+            return index
+
+        if not isinstance(index, pd.DatetimeIndex):
+            text = pd.Index(index).astype(str)
+            if text.str.contains(r'\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:Z|[+-]\d{2}:?\d{2})$').any():
+                # Mixed DST offsets (+02:00/+03:00) only parse as one index in UTC
+                return pd.to_datetime(text, utc=True)
+            index = pd.DatetimeIndex(pd.to_datetime(text))
+
+        try:
+            # Local wall-clock data: the October hour repeats, the March hour is missing
+            return index.tz_localize(TZ, ambiguous='infer', nonexistent='raise')
+        except Exception:
+            # No DST pattern: typical-year files are in local standard time
+            return index.tz_localize(timezone(self.weather_std_offset))
+
+    @staticmethod
+    def weather_step_ns(index):
+        diffs = np.diff(index.as_unit('ns').asi8)
+        diffs = diffs[diffs > 0]
+        if len(diffs) == 0:
+            raise ValueError("weather file needs at least two distinct timestamps")
+        return int(np.median(diffs))
+
+    @staticmethod
+    def is_regular(index, step_ns):
+        return index.is_monotonic_increasing and bool(np.all(np.diff(index.as_unit('ns').asi8) == step_ns))
+
+    def local_standard_time(self, index):
+        return index.tz_convert('UTC').tz_localize(None) + self.weather_std_offset
+
+    @staticmethod
+    def is_about_a_year(rows, step_ns):
+        return abs(rows * step_ns - 365 * 86400 * 10 ** 9) <= 86400 * 10 ** 9
+
+    def load_weather(self, path):
+        if path.lower().endswith('.npy'):
+            # Structured array with a 'time' (datetime64, UTC) field
+            arr = np.load(path, mmap_mode='r')
+            index = pd.DatetimeIndex(arr['time']).tz_localize('UTC').as_unit('ns')
+            step_ns = self.weather_step_ns(index)
+            local = self.local_standard_time(index)
+            has_feb29 = bool(np.any((local.month == 2) & (local.day == 29)))
+            if set(WEATHER_COLUMNS) <= set(arr.dtype.names) and self.is_regular(index, step_ns) \
+                    and not (has_feb29 and self.is_about_a_year(len(index), step_ns)):
+                # Complete and gap-free: keep the columns as views into the memory map
+                self.set_weather_grid(index, step_ns, regular=True)
+                self.weather = {c: arr[c] for c in WEATHER_COLUMNS}
+                print(f"Mapped {self.weather_len} weather rows from {path}")
+                return
+            df = pd.DataFrame({c: np.asarray(arr[c]) for c in arr.dtype.names if c != 'time'}, index=index)
+        else:
+            df = self.read_weather_file(path)
+            df.index = self.parse_weather_index(df.index)
+
+        if 'ghi' not in df.columns:
+            raise ValueError(f"{path} has no 'ghi' column")
+        if 'dni' not in df.columns or 'dhi' not in df.columns:
+            zenith = self.location.get_solarposition(df.index)['zenith']
+            split = pvlib.irradiance.erbs(df['ghi'], zenith, df.index)
+            df['dni'] = split['dni']
+            df['dhi'] = split['dhi']
+        if 'temp_air' not in df.columns:
+            df['temp_air'] = 10.0
+        if 'wind_speed' not in df.columns:
+            df['wind_speed'] = 2.0
+        df = df[WEATHER_COLUMNS].astype(float)
+        df.index = df.index.tz_convert('UTC').as_unit('ns')
+
+        step_ns = self.weather_step_ns(df.index)
+        step = pd.Timedelta(step_ns, unit='ns')
+        if df.index.is_monotonic_increasing and not self.is_regular(df.index, step_ns):
+            # Logger gaps/duplicates: put the series on a regular grid once so
+            # row i always covers start + i * step
+            rows = len(df)
+            df = df[~df.index.duplicated()].resample(step, origin='start').mean()
+            print(f"Weather file resampled to {step} grid ({len(df) - rows:+d} rows)")
+        df = df.interpolate(limit_direction='both')
+
+        # A one-year file from a leap year: drop Feb 29 so it matches the
+        # 365-day typical year the lookups are folded onto
+        local = self.local_standard_time(df.index)
+        feb29 = (local.month == 2) & (local.day == 29)
+        if feb29.any() and self.is_about_a_year(len(df), step_ns):
+            df = df[~feb29]
+
+        self.set_weather_grid(df.index, step_ns, regular=self.is_regular(df.index, step_ns))
+        if self.weather_start is None and not self.weather_typical_year:
+            raise ValueError(f"{path} is neither in time order nor a typical year")
+        self.weather = {c: df[c].to_numpy() for c in WEATHER_COLUMNS}
+        print(f"Loaded {self.weather_len} weather rows from {path}")
+
+    def set_weather_grid(self, index, step_ns, regular):
+        # TMY files stitch months from different years, so their rows are only
+        # addressable by position within the typical year.
+        self.weather_step = step_ns / 10 ** 9
+        self.weather_start = index[0] if regular else None
+        self.weather_len = len(index)
+        self.weather_typical_year = self.is_about_a_year(self.weather_len, step_ns)
+        self.weather_toy_start = int(self.time_of_year(index[:1])[0])
+
+    def time_of_year(self, index):
+        # Seconds since Jan 1 in standard time, with Feb 29 folded onto Feb 28
+        # so leap years line up with the 365-day typical year.
+        local = self.local_standard_time(index)
+        day = local.dayofyear.to_numpy() - 1
+        day = day - (local.is_leap_year & (local.dayofyear > 59)).astype(int)
+        secs = local.hour.to_numpy() * 3600 + local.minute.to_numpy() * 60 + local.second.to_numpy()
+        return day * 86400 + secs
+
+    def weather_positions(self, times):
+        # Row per timestamp, -1 where the file has no data
+        pos = np.full(len(times), -1, dtype=np.int64)
+        inside = np.zeros(len(times), dtype=bool)
+
+        # Measured series: direct offset from the first row
+        if self.weather_start is not None:
+            offset = (times - self.weather_start).total_seconds().to_numpy() // self.weather_step
+            inside = (offset >= 0) & (offset < self.weather_len)
+            pos[inside] = offset[inside].astype(np.int64)
+
+        # Typical year (or a full measured year): same moment of the year
+        if self.weather_typical_year:
+            toy = self.time_of_year(times[~inside]) - self.weather_toy_start
+            pos[~inside] = (toy // self.weather_step) % self.weather_len
+        return pos
+
+    def get_clearsky_weather(self, times):
+        weather = self.location.get_clearsky(times)
+        weather['temp_air'] = 10.0
+        weather['wind_speed'] = 2.0
+        return weather[WEATHER_COLUMNS]
+
+    def get_weather(self, times):
+        # Returns the weather frame and a mask of rows taken from the file
+        if self.weather is None:
+            return self.get_clearsky_weather(times), np.zeros(len(times), dtype=bool)
+
+        pos = self.weather_positions(times)
+        measured = pos >= 0
+        take = np.where(measured, pos, 0)
+        weather = pd.DataFrame({c: np.asarray(self.weather[c][take], dtype=float) for c in WEATHER_COLUMNS},
+                               index=times)
+        if not measured.all():
+            weather.loc[~measured, WEATHER_COLUMNS] = self.get_clearsky_weather(times[~measured]).to_numpy()
+        return weather, measured
+
     @staticmethod
     def get_house_consumption(timestamp):
         hour = int(timestamp.hour)
@@ -122,28 +308,43 @@ class ProsumerSim:
 
         return max(0.1, base_load + base_noise)
 
-    def get_solar_production(self, timestamp):
-        try:
-            weather = self.location.get_clearsky(pd.DatetimeIndex([timestamp]))
-            weather['temp_air'] = 10.0
-            weather['wind_speed'] = 2.0
-            self.mc.run_model(weather)
+    def apply_clouds(self, ideal_power, measured=False):
+        if ideal_power < 10:
+            return 0.0
+
+        # Measured irradiance already contains the clouds
+        if measured:
+            return ideal_power / 1000
 
-            ideal_power = self.mc.results.ac.iloc[0]
-            if ideal_power < 10:
-                return 0.0
+        change = random.uniform(-0.1, 0.1)
+        self.cloud_cover += change
+        self.cloud_cover = max(0.2, min(1.0, self.cloud_cover))
+        if random.random() > 0.8:
+            self.cloud_cover = 1.0
 
-            change = random.uniform(-0.1, 0.1)
-            self.cloud_cover += change
-            self.cloud_cover = max(0.2, min(1.0, self.cloud_cover))
-            if random.random() > 0.8:
-                self.cloud_cover = 1.0
+        noisy_power = (ideal_power * self.cloud_cover) + random.uniform(-50, 50)
+        return max(0, noisy_power / 1000)
 
-            noisy_power = (ideal_power * self.cloud_cover) + random.uniform(-50, 50)
-            return max(0, noisy_power / 1000)
+    def get_solar_production(self, timestamp):
+        try:
+            weather, measured = self.get_weather(pd.DatetimeIndex([timestamp]))
+            self.mc.run_model(weather)
+            return self.apply_clouds(self.mc.results.ac.iloc[0], measured[0])
         except:
             return 0.0
 
+    def get_solar_batch(self, times):
+        # One vectorized model run for the whole range
+        try:
+            weather, measured = self.get_weather(times)
+            self.mc.run_model(weather)
+            ac = self.mc.results.ac.fillna(0).to_numpy(dtype=float)
+        except Exception as e:
+            print(f"Solar Batch Error: {e}")
+            ac = np.zeros(len(times))
+            measured = np.zeros(len(times), dtype=bool)
+        return [self.apply_clouds(p, m) for p, m in zip(ac, measured)]
+
 
 # ==========================================
 #   MAIN APP
@@ -549,8 +750,9 @@ class SolarApp(ctk.CTk):
             # Reset battery for simulation
             self.sim_engine.battery.soc = 20.0
 
-            for t in times:
-                sol = self.sim_engine.get_solar_production(t)
+            solar = self.sim_engine.get_solar_batch(times)
+
+            for t, sol in zip(times, solar):
                 house = self.sim_engine.get_house_consumption(t)
                 net = sol - house
                 batt_kw, grid_kw = self.sim_engine.battery.update(net, duration_hours=0.25)